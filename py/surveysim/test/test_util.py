@@ -7,6 +7,7 @@ import numpy as np
 import astropy.table
 
 import desisurvey.tiles
+import desisurvey.utils
 
 import surveysim.exposures
 
@@ -23,10 +24,20 @@ class TestUtil(Tester):
         config = desisurvey.config.Configuration()
         tiles = desisurvey.tiles.get_tiles()
         tileID = tiles.tileID[0]
-        # List some science exposures.
+        # Pick tiles from two different programs.
+        programs = [p for p in tiles.programs if np.any(tiles.program_mask[p])][:2]
+        self.assertEqual(len(programs), 2)
+        program_tile = {p: tiles.tileID[tiles.program_mask[p]][0] for p in programs}
+        # List some science exposures as (MJD, program) for each night,
+        # with two exposures from different programs on the first night.
+        science_exps = [[(58849., programs[0]), (58849.01, programs[1])],
+                        [(58850., programs[1])]]
         exposures = surveysim.exposures.ExposureList()
-        exposures.add(58849., 1., tileID, 1., 1., 1., 1.1, 0.9, 1.0)
-        exposures.add(58850., 1., tileID, 1., 1., 1., 1.1, 0.9, 1.0)
+        for night_exps in science_exps:
+            for mjd, program in night_exps:
+                exposures.add(mjd, 1., program_tile[program],
+                              1., 1., 1., 1.1, 0.9, 1.0)
+        nout = 6 * len(science_exps) + exposures.nexp
         for mode in 'obj', 'recarray', 'table':
             if mode == 'obj':
                 input = exposures
@@ -38,11 +49,34 @@ class TestUtil(Tester):
                     config.get_path('exposures.fits'), hdu='EXPOSURES')
             # Validate the output.
             output = add_calibration_exposures(input)
-            self.assertEqual(len(output), 14)
+            self.assertEqual(len(output), nout)
             self.assertEqual('EXPID', output.colnames[0])
-            self.assertTrue(np.all(output['EXPID'] == np.arange(14, dtype=np.int32)))
+            self.assertTrue(np.all(output['EXPID'] == np.arange(nout, dtype=np.int32)))
             self.assertTrue(np.all(np.diff(output['MJD']) >= 0))
             self.assertTrue(np.all(np.diff(output['EXPID']) == 1))
+            # Each night has a calibration sequence then its science exposures.
+            nights = np.unique(output['NIGHT'])
+            self.assertEqual(len(nights), len(science_exps))
+            self.assertTrue(np.all(output['NIGHT'] == np.repeat(
+                nights, [6 + len(night_exps) for night_exps in science_exps])))
+            for night, night_exps in zip(nights, science_exps):
+                mjds = [mjd for mjd, program in night_exps]
+                night_programs = [program for mjd, program in night_exps]
+                rows = output[output['NIGHT'] == night]
+                calib, science = rows[:6], rows[6:]
+                self.assertEqual(list(calib['FLAVOR']), ['arc'] * 3 + ['flat'] * 3)
+                self.assertTrue(np.all(calib['EXPTIME'] == 10.))
+                self.assertTrue(np.all(calib['TILEID'] == -1))
+                self.assertTrue(np.all(calib['PROGRAM'] == 'CALIB'))
+                self.assertTrue(np.all(calib['MJD'] < science['MJD'][0]))
+                self.assertTrue(np.all(science['FLAVOR'] == 'science'))
+                self.assertTrue(np.all(science['MJD'] == mjds))
+                self.assertEqual(list(science['PROGRAM']), night_programs)
+                self.assertEqual(list(science['TILEID']),
+                                 [program_tile[p] for p in night_programs])
+                for mjd in mjds:
+                    self.assertEqual(night, desisurvey.utils.get_date(
+                        mjd).isoformat().replace('-', ''))
 
         # List some out-of-order science exposures.
         bad_exposures = surveysim.exposures.ExposureList()
@@ -8,7 +8,29 @@ import desisurvey.config
 import desisurvey.ephem
 
 from desisurvey.test.base import Tester
-from surveysim.weather import Weather
+from surveysim.weather import Weather, _dome_closed, _dome_closed_fractions
+
+
+def _dome_closed_loop(night_mjd, dome_closed_frac, bright_dusk, bright_dawn, r):
+    """Reference per-night implementation of the dome closed scenarios."""
+    dome_closed_time = dome_closed_frac * (bright_dawn - bright_dusk)
+    result = np.zeros(night_mjd.shape, bool)
+    for i in range(len(night_mjd)):
+        closed = (night_mjd[i] < bright_dusk[i]) | (night_mjd[i] >= bright_dawn[i])
+        if dome_closed_frac[i] == 0:
+            pass
+        elif dome_closed_frac[i] == 1:
+            closed[:] = True
+        elif r[i] < 0.5 * dome_closed_frac[i]:
+            closed |= (night_mjd[i] < bright_dusk[i] + dome_closed_time[i])
+        elif r[i] < dome_closed_frac[i]:
+            closed |= (night_mjd[i] > bright_dawn[i] - dome_closed_time[i])
+        else:
+            dome_open_at = bright_dusk[i] + r[i] * (bright_dawn[i] - bright_dusk[i])
+            dome_closed_at = dome_open_at - dome_closed_time[i]
+            closed |= (night_mjd[i] >= dome_closed_at) & (night_mjd[i] < dome_open_at)
+        result[i] = closed
+    return result
 
 
 class TestWeather(Tester):
@@ -24,6 +46,55 @@ class TestWeather(Tester):
         open_nights = np.any(self.w._table['open'].reshape(n_nights, -1), axis=1).sum()
         self.assertEqual(open_nights, 49)
 
+    def test_dome_closed(self):
+        """Dome closed scenarios should match the per-night reference loop"""
+        # Use dyadic times so that every scenario boundary, and the ties
+        # r == frac / 2 and r == frac, fall exactly on a time step.
+        frac = np.array([0., 1., 0.25, 0.25, 0.25, 0.25, 0.25])
+        r = np.array([0.5, 0.5, 0.1, 0.125, 0.2, 0.25, 0.5])
+        nights = 58849. + np.arange(len(frac))
+        night_mjd = nights[:, np.newaxis] + np.arange(16) / 16.
+        dusk, dawn = nights + 0.25, nights + 0.75
+        closed = _dome_closed(night_mjd, frac, dusk, dawn, r)
+        self.assertTrue(np.array_equal(
+            closed, _dome_closed_loop(night_mjd, frac, dusk, dawn, r)))
+        k = np.arange(16)
+        always = (k < 4) | (k >= 12)
+        expected = np.array([
+            always,                          # Open all night.
+            np.ones(16, bool),               # Closed all night.
+            always | (k < 6),                # Closed at start of night.
+            always | (k > 10),               # r == frac / 2: closed at end.
+            always | (k > 10),               # Closed at end of night.
+            always | ((k >= 4) & (k < 6)),   # r == frac: closed in middle.
+            always | ((k >= 6) & (k < 8)),   # Closed in middle of night.
+        ])
+        self.assertTrue(np.array_equal(closed, expected))
+        # Random nights with typical time steps.
+        gen = np.random.RandomState(123)
+        n = 500
+        frac = gen.uniform(size=n)
+        frac[::5] = 0.
+        frac[1::5] = 1.
+        r = gen.uniform(size=n)
+        nights = 58849. + np.arange(n)
+        night_mjd = nights[:, np.newaxis] + np.arange(288) / 288.
+        dusk = nights + gen.uniform(0.1, 0.4, size=n)
+        dawn = nights + gen.uniform(0.6, 0.9, size=n)
+        self.assertTrue(np.array_equal(
+            _dome_closed(night_mjd, frac, dusk, dawn, r),
+            _dome_closed_loop(night_mjd, frac, dusk, dawn, r)))
+
+    def test_dome_closed_fractions_cached(self):
+        """Dome closed fractions should be cached and read only"""
+        hits = _dome_closed_fractions.cache_info().hits
+        w = Weather(seed=1, replay='Y2015')
+        self.assertEqual(_dome_closed_fractions.cache_info().hits, hits + 1)
+        frac = _dome_closed_fractions(w.start_date, w.stop_date, w.replay)
+        self.assertFalse(frac.flags.writeable)
+        with self.assertRaises(ValueError):
+            frac[0] = 0.
+
     def test_same_seed(self):
         """Weather should be identical with same seed"""
         w = Weather(seed=123, replay='Y2015')
@@ -43,9 +114,19 @@ class TestWeather(Tester):
         t_step = table['mjd'][1] - table['mjd'][0]
         dt = np.random.uniform(-0.49 * t_step, 0.49 * t_step, size=len(table))
         when = astropy.time.Time(table['mjd'] + dt, format='mjd')
-        for i in range(1, len(table) - 1):
-            row = self.w.get(when[i])
-            self.assertEqual(row['mjd'], table[i]['mjd'])
+        rows = self.w.get(when[1:-1])
+        self.assertTrue(np.all(rows['mjd'] == table['mjd'][1:-1]))
+
+    def test_get_half_step(self):
+        """Times half a step after a row should get the next row"""
+        table = self.w._table
+        half_step = 0.5 / self.w.steps_per_day
+        when = astropy.time.Time(table['mjd'][:-1] + half_step, format='mjd')
+        rows = self.w.get(when)
+        self.assertTrue(np.all(rows['mjd'] == table['mjd'][1:]))
+        # The first row starts half a step before its tabulated time.
+        row = self.w.get(astropy.time.Time(table['mjd'][0] - half_step, format='mjd'))
+        self.assertEqual(row['mjd'], table['mjd'][0])
 
     def test_get_multiple(self):
         """The get() method can be called with one or multiple times."""
@@ -58,6 +139,19 @@ class TestWeather(Tester):
         for i in range(5):
             self.assertTrue(0. <= rows['transparency'][i] <= 1.)
 
+    def test_get_out_of_range(self):
+        """The get() method should reject times beyond the tabulated range."""
+        table = self.w._table
+        t_step = table['mjd'][1] - table['mjd'][0]
+        for mjd in (table['mjd'][0] - t_step, table['mjd'][-1] + t_step):
+            with self.assertRaises(ValueError):
+                self.w.get(astropy.time.Time(mjd, format='mjd'))
+            with self.assertRaises(ValueError):
+                self.w.get(astropy.time.Time([table['mjd'][10], mjd], format='mjd'))
+        # An empty time array is valid input and gives an empty table.
+        rows = self.w.get(astropy.time.Time([], format='mjd'))
+        self.assertEqual(len(rows), 0)
+
     def test_save_restore(self):
         """Save and restore a weather file"""
         self.w.save('weather.fits')
@@ -70,12 +70,16 @@ def add_calibration_exposures(exposures, flats_per_night=3, arcs_per_night=3,
     calib_sequence = (['arc']*arcs_per_night + ['flat']*flats_per_night +
                       ['dark']*darks_per_night + ['zero']*zeroes_per_night)
     calib_times = np.cumsum(np.array([calib_time(c) for c in calib_sequence]))[::-1]
+    calib_exptimes = np.array([exptime[c] for c in calib_sequence])
+    ncalib_per_night = len(calib_sequence)
 
     # Group exposures by night.
     MJD0 = desisurvey.utils.local_noon_on_date(desisurvey.utils.get_date(MJD[0])).mjd
     night_idx = np.floor(MJD - MJD0).astype(int)
-    nights = np.unique(night_idx)
-    ncalib = len(calib_sequence) * len(nights)
+    # Exposures are sorted, so each night is a contiguous block.
+    nights, night_first, night_nexp = np.unique(
+        night_idx, return_index=True, return_counts=True)
+    ncalib = ncalib_per_night * len(nights)
 
     # Initialize the output table.
     output = astropy.table.Table()
@@ -90,6 +94,7 @@ def add_calibration_exposures(exposures, flats_per_night=3, arcs_per_night=3,
     output['NIGHT'] = astropy.table.Column(dtype=(str, len('YYYYMMDD')), length=nout)
     output['FLAVOR'] = astropy.table.Column(dtype=(str, len('science')), length=nout)
     tiles = desisurvey.tiles.get_tiles()
+    science_program = tiles.tileprogram[tiles.index(exposures['TILEID'])]
 
     # Moon parameters are hardcoded for now.
     output['MOONFRAC'] = 0.5
@@ -98,27 +103,24 @@ def add_calibration_exposures(exposures, flats_per_night=3, arcs_per_night=3,
 
     # Loop over nights.
     out_idx = 0
-    for n in nights:
-        sel = (night_idx == n)
-        nsel = np.count_nonzero(sel)
-        first = np.where(sel)[0][0]
+    for first, nsel in zip(night_first, night_nexp):
+        sel = slice(first, first + nsel)
         MJD_first = MJD[first]
         NIGHT = desisurvey.utils.get_date(MJD_first).isoformat().replace('-', '')
         # Append the calibration sequence.
-        for j, c in enumerate(calib_sequence):
-            output['MJD'][out_idx] = MJD_first - calib_times[j]/86400.0
-            output['EXPTIME'][out_idx] = exptime[c]
-            output['TILEID'][out_idx] = -1
-            output['PROGRAM'][out_idx] = 'CALIB'
-            output['NIGHT'][out_idx] = NIGHT
-            output['FLAVOR'][out_idx] = c
-            out_idx += 1
+        calslice = slice(out_idx, out_idx + ncalib_per_night)
+        output['MJD'][calslice] = MJD_first - calib_times / 86400.0
+        output['EXPTIME'][calslice] = calib_exptimes
+        output['TILEID'][calslice] = -1
+        output['PROGRAM'][calslice] = 'CALIB'
+        output['NIGHT'][calslice] = NIGHT
+        output['FLAVOR'][calslice] = calib_sequence
+        out_idx += ncalib_per_night
         # Append the night's science exposures.
         outslice = slice(out_idx, out_idx + nsel)
         for colname in template.colnames:
             output[colname][outslice] = exposures[colname][sel]
-        TILEIDs = exposures['TILEID'][sel]
-        output['PROGRAM'][outslice] = tiles.tileprogram[tiles.index(TILEIDs)]
+        output['PROGRAM'][outslice] = science_program[sel]
         output['NIGHT'][outslice] = NIGHT
         output['FLAVOR'][outslice] = 'science'
         out_idx += nsel
@@ -126,5 +128,5 @@ def add_calibration_exposures(exposures, flats_per_night=3, arcs_per_night=3,
 
     log = desiutil.log.get_logger()
     log.info('Added {} nightly calibration sequences of {} exposures each to {} science exposures.'
-             .format(len(nights), len(calib_sequence), nexp))
+             .format(len(nights), ncalib_per_night, nexp))
     return output
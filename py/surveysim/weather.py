@@ -4,6 +4,7 @@ The simulated conditions include seeing, transparency and the dome-open fraction
 """
 from __future__ import print_function, division, absolute_import
 
+import functools
 from datetime import datetime
 
 import numpy as np
@@ -21,6 +22,75 @@ import desisurvey.ephem
 import desisurvey.utils
 
 
+@functools.lru_cache(maxsize=1)
+def _dome_closed_fractions(start_date, stop_date, replay):
+    """Cached wrapper of :func:`desimodel.weather.dome_closed_fractions`.
+
+    Only the most recent result is kept, since a simulation uses a single
+    date range and replay, while random replays rarely repeat.
+    The returned array is shared between callers so is made read only.
+    """
+    frac = np.asarray(desimodel.weather.dome_closed_fractions(
+        start_date, stop_date, replay=replay), dtype=np.float64)
+    frac.flags.writeable = False
+    return frac
+
+
+def _dome_closed(night_mjd, dome_closed_frac, bright_dusk, bright_dawn, r):
+    """Simulate when the dome is closed during each night.
+
+    All nights are evaluated at once, with one row of ``night_mjd`` per night.
+
+    Parameters
+    ----------
+    night_mjd : array
+        MJD timestamps with shape (num_nights, steps_per_day).
+    dome_closed_frac : array
+        Fraction of the scheduled time that the dome is closed on each night.
+    bright_dusk : array
+        MJD of bright dusk on each night.
+    bright_dawn : array
+        MJD of bright dawn on each night.
+    r : array
+        Uniform random numbers in [0, 1) for each night, used to pick the
+        closed scenario of partially closed nights.
+
+    Returns
+    -------
+    array
+        Boolean array with the same shape as ``night_mjd`` that is True
+        when the dome is closed.
+    """
+    frac = dome_closed_frac[:, np.newaxis]
+    dusk = bright_dusk[:, np.newaxis]
+    dawn = bright_dawn[:, np.newaxis]
+    r = r[:, np.newaxis]
+    # Convert fractions of scheduled time to hours per night.
+    tclosed = frac * (dawn - dusk)
+    # Dome is always closed before dusk and after dawn.
+    closed = (night_mjd < dusk) | (night_mjd >= dawn)
+    # Dome closed all night. This occurs with probability frac / 2.
+    closed |= (frac == 1)
+    # Nights with frac == 0 have the dome open all night.
+    partial = (frac > 0) & (frac < 1)
+    # Dome closed during first part of the night.
+    # This occurs with probability frac / 2.
+    first = partial & (r < 0.5 * frac)
+    closed |= first & (night_mjd < dusk + tclosed)
+    # Dome closed during last part of the night.
+    # This occurs with probability frac / 2.
+    last = partial & ~first & (r < frac)
+    closed |= last & (night_mjd > dawn - tclosed)
+    # Dome closed during the middle of the night.
+    # This occurs with probability 1 - frac.  Use the value of r
+    # as the fractional time during the night when the dome reopens.
+    middle = partial & (r >= frac)
+    dome_open_at = dusk + r * (dawn - dusk)
+    dome_closed_at = dome_open_at - tclosed
+    closed |= middle & (night_mjd >= dome_closed_at) & (night_mjd < dome_open_at)
+    return closed
+
+
 class Weather(object):
     """Simulate weather conditions affecting observations.
 
@@ -97,9 +167,8 @@ class Weather(object):
         self._table = astropy.table.Table(meta=meta)
 
         # Initialize column of MJD timestamps.
-        t0 = desisurvey.utils.local_noon_on_date(start_date)
-        times = t0 + (np.arange(num_rows) / float(steps_per_day)) * u.day
-        self._table['mjd'] = times.mjd
+        mjd0 = desisurvey.utils.local_noon_on_date(start_date).mjd
+        self._table['mjd'] = mjd0 + np.arange(num_rows) / float(steps_per_day)
 
         # Generate a random atmospheric seeing time series.
         dt_sec = 24 * 3600. / steps_per_day
@@ -120,14 +189,11 @@ class Weather(object):
         # This step is deterministic and only depends on the config weather
         # parameter, which specifies which year(s) of historical daily
         # weather to replay during the simulation.
-        dome_closed_frac = desimodel.weather.dome_closed_fractions(
-            start_date, stop_date, replay=replay)
+        dome_closed_frac = _dome_closed_fractions(start_date, stop_date, replay)
 
-        # Convert fractions of scheduled time to hours per night.
         ilo, ihi = (start_date - ephem.start_date).days, (stop_date - ephem.start_date).days
         bright_dusk = ephem._table['brightdusk'].data[ilo:ihi]
         bright_dawn = ephem._table['brightdawn'].data[ilo:ihi]
-        dome_closed_time = dome_closed_frac * (bright_dawn - bright_dusk)
 
         # Randomly pick between three scenarios for partially closed nights:
         # 1. closed from dusk, then open the rest of the night.
@@ -137,34 +203,10 @@ class Weather(object):
         # Use a fixed number of random numbers to decouple from the seeing
         # and transparency sampling below.
         r = gen.uniform(size=num_nights)
-        self._table['open'] = np.ones(num_rows, bool)
-        for i in range(num_nights):
-            sl = slice(i * steps_per_day, (i + 1) * steps_per_day)
-            night_mjd = self._table['mjd'][sl]
-            # Dome is always closed before dusk and after dawn.
-            closed = (night_mjd < bright_dusk[i]) | (night_mjd >= bright_dawn[i])
-            if dome_closed_frac[i] == 0:
-                # Dome open all night.
-                pass
-            elif dome_closed_frac[i] == 1:
-                # Dome closed all night. This occurs with probability frac / 2.
-                closed[:] = True
-            elif r[i] < 0.5 * dome_closed_frac[i]:
-                # Dome closed during first part of the night.
-                # This occurs with probability frac / 2.
-                closed |= (night_mjd < bright_dusk[i] + dome_closed_time[i])
-            elif r[i] < dome_closed_frac[i]:
-                # Dome closed during last part of the night.
-                # This occurs with probability frac / 2.
-                closed |= (night_mjd > bright_dawn[i] - dome_closed_time[i])
-            else:
-                # Dome closed during the middle of the night.
-                # This occurs with probability 1 - frac.  Use the value of r[i]
-                # as the fractional time during the night when the dome reopens.
-                dome_open_at = bright_dusk[i] + r[i] * (bright_dawn[i] - bright_dusk[i])
-                dome_closed_at = dome_open_at - dome_closed_time[i]
-                closed |= (night_mjd >= dome_closed_at) & (night_mjd < dome_open_at)
-            self._table['open'][sl][closed] = False
+        night_mjd = self._table['mjd'].data.reshape(num_nights, steps_per_day)
+        closed = _dome_closed(
+            night_mjd, dome_closed_frac, bright_dusk, bright_dawn, r)
+        self._table['open'] = ~closed.reshape(num_rows)
 
         self.start_date = start_date
         self.stop_date = stop_date
@@ -209,9 +251,10 @@ class Weather(object):
             Slice of precomputed table containing row(s) corresponding
             to the requested time(s).
         """
-        offset = np.floor(
-            (time.mjd - self._table['mjd'][0]) * self.steps_per_day + 0.5
-            ).astype(int)
-        if np.any(offset < 0) or np.any(offset > len(self._table)):
+        # Row i covers times in [mjd[i] - dt/2, mjd[i] + dt/2).
+        mjd = self._table['mjd'].data
+        half_step = 0.5 / self.steps_per_day
+        offset = np.searchsorted(mjd, time.mjd - half_step, side='right')
+        if np.any(time.mjd < mjd[0] - half_step) or np.any(offset >= len(mjd)):
             raise ValueError('Cannot get weather beyond tabulated range.')
         return self._table[offset]